@@ -1,53 +1,171 @@
-import os
+import binascii
 import hashlib
-from pydantic import BaseModel
-from typing import Optional, Dict, Any
+import secrets
+from functools import lru_cache
+from typing import Dict, Any
+
+try:
+    # Native Poseidon over BN254 (Rust light-poseidon binding), built separately
+    from app.crypto._poseidon import poseidon_bn254
+except ImportError:
+    poseidon_bn254 = None
+
+FIELD_ELEMENT_SIZE = 32
+
+# Order of the BN254 scalar field the circuit (and Poseidon) works in
+BN254_FIELD_MODULUS = 21888242871839275222246405745257275088548364400416034343698204186575808495617
+# Big-endian bytes of equal width compare like the numbers they encode
+BN254_FIELD_MODULUS_BYTES = BN254_FIELD_MODULUS.to_bytes(FIELD_ELEMENT_SIZE, 'big')
+
+def field_element_bytes(value):
+    """Encodes a note value as a 32-byte big-endian BN254 field element.
+    Integers are encoded directly. Strings must be hex, optionally 0x-prefixed
+    (as produced by the circuit utilities), and are read as numbers, as are
+    bytes: both are left-padded with zeros to 32 bytes, so leading zeros do not
+    change the element and concatenated elements cannot run into each other.
+    Values that are not hex, are empty, are longer than 32 bytes or are not
+    below the field modulus raise ValueError.
+    """
+    if isinstance(value, int):
+        if not 0 <= value < BN254_FIELD_MODULUS:
+            raise ValueError("Field element must be a non-negative integer below the BN254 field modulus")
+        return value.to_bytes(FIELD_ELEMENT_SIZE, 'big')
+    if isinstance(value, (bytes, bytearray)):
+        value = bytes(value)
+    elif isinstance(value, str):
+        digits = value[2:] if value[:2].lower() == '0x' else value
+        if len(digits) % 2:
+            digits = '0' + digits
+        try:
+            decoded = bytes.fromhex(digits)
+        except ValueError:
+            decoded = None
+        # fromhex tolerates whitespace between bytes; field elements must not contain any
+        if decoded is None or len(decoded) * 2 != len(digits):
+            raise ValueError(f"Field element must be a hex string, got {value!r}")
+        value = decoded
+    else:
+        raise ValueError(f"Unsupported field element type: {type(value).__name__}")
+    if not value or len(value) > FIELD_ELEMENT_SIZE:
+        raise ValueError(f"Field element must be 1 to {FIELD_ELEMENT_SIZE} bytes long")
+    value = value.rjust(FIELD_ELEMENT_SIZE, b'\0')
+    if value >= BN254_FIELD_MODULUS_BYTES:
+        raise ValueError("Field element must be below the BN254 field modulus")
+    return value
+
+def _field_inputs(inputs):
+    """Returns hash inputs as field element bytes, normalized by field_element_bytes."""
+    return [field_element_bytes(item) for item in inputs]
 
 def poseidon_hash_placeholder(inputs):
-    """Placeholder for a ZK-friendly hash function like Poseidon.
-    Uses SHA256 for demonstration in Python. Inputs are converted to strings.
-    In a real scenario, inputs would be field elements and a proper ZK-hash would be used.
+    """ZK-friendly hash of a list of field elements.
+    Uses the native Poseidon (BN254) binding when it is available, matching the
+    hash used by the withdraw circuit. Otherwise falls back to SHA256 for
+    demonstration; that fallback is NOT compatible with the circuit.
+    Inputs are normalized with field_element_bytes, so ints, bytes and hex
+    strings hash the same on every path.
     """
-    hasher = hashlib.sha256()
-    for item in inputs:
-        hasher.update(str(item).encode('utf-8'))
-    return hasher.hexdigest()
+    if poseidon_bn254 is not None:
+        return poseidon_bn254(_field_inputs(inputs)).hex()
+    return hashlib.sha256(b''.join(_field_inputs(inputs))).hexdigest()
+
+# Domain separator (1) distinguishing nullifier hashes, as a field element
+NULLIFIER_DOMAIN_SEPARATOR = field_element_bytes(1)
+
+def _note_hashes(amount_be, secret_b, nullifier_b):
+    """Computes a note's commitment and nullifier hash together.
+    commitment = H(amount, secret, nullifier_secret)
+    nullifier_hash = H(nullifier_secret, domain_separator)
+    Inputs are field element bytes; both hashes are dispatched in one place
+    instead of going through the generic input normalization twice.
+    """
+    if poseidon_bn254 is not None:
+        return (
+            poseidon_bn254([amount_be, secret_b, nullifier_b]).hex(),
+            poseidon_bn254([nullifier_b, NULLIFIER_DOMAIN_SEPARATOR]).hex()
+        )
+    return (
+        hashlib.sha256(amount_be + secret_b + nullifier_b).hexdigest(),
+        hashlib.sha256(nullifier_b + NULLIFIER_DOMAIN_SEPARATOR).hexdigest()
+    )
+
+# Bound on memoized hashes of caller-supplied secrets
+HASH_CACHE_SIZE = 4096
+
+# Memoized variant, for notes whose secrets may be resubmitted (e.g. client
+# retries). Fresh random secrets never repeat and would just churn the cache.
+_note_hashes_cached = lru_cache(maxsize=HASH_CACHE_SIZE)(_note_hashes)
+
+def _random_field_element(byte_length=31):
+    """Generates a random field element; 31 random bytes always stay below the modulus."""
+    return secrets.token_bytes(byte_length).rjust(FIELD_ELEMENT_SIZE, b'\0')
 
-def generate_random_field_element_hex(byte_length=31):
-    """Generates a random hex string representing a field element (approx)."""
-    return os.urandom(byte_length).hex()
+def _to_hex(value):
+    """Hex-encodes raw field element bytes for the JSON boundary."""
+    return binascii.hexlify(value).decode('ascii')
+
+def build_note(amount, secret=None, nullifier_secret=None) -> Dict[str, Any]:
+    """Builds a note straight into its API dictionary form.
+    Equivalent to Note(amount, secret, nullifier_secret).to_dict(), without
+    allocating a Note instance; used on the request hot path.
+    """
+    amount = int(amount)
+    amount_be = field_element_bytes(amount)
+    secret_b = field_element_bytes(secret) if secret is not None else _random_field_element()
+    nullifier_b = field_element_bytes(nullifier_secret) if nullifier_secret is not None else _random_field_element()
+
+    hashes = _note_hashes_cached if secret is not None and nullifier_secret is not None else _note_hashes
+    commitment, nullifier_hash = hashes(amount_be, secret_b, nullifier_b)
+
+    return {
+        "amount": amount,
+        "secret": secret if isinstance(secret, str) else _to_hex(secret_b),
+        "nullifier_secret": nullifier_secret if isinstance(nullifier_secret, str) else _to_hex(nullifier_b),
+        "commitment": commitment,
+        "nullifier_hash": nullifier_hash
+    }
 
 class Note:
     def __init__(self, amount, secret=None, nullifier_secret=None):
+        self._set_fields(amount, secret, nullifier_secret)
+
+        hashes = _note_hashes_cached if self._custom_secrets else _note_hashes
+        self.commitment, self.nullifier_hash = hashes(self._amount_be, self._secret_b, self._nullifier_b)
+
+    @classmethod
+    def batch(cls, amounts):
+        """Creates one note with fresh secrets per amount."""
+        return [cls(amount) for amount in amounts]
+
+    def _set_fields(self, amount, secret, nullifier_secret):
         self.amount = int(amount)
-        self.secret = secret if secret is not None else generate_random_field_element_hex()
-        self.nullifier_secret = nullifier_secret if nullifier_secret is not None else generate_random_field_element_hex()
-        
-        self.commitment = self._calculate_commitment()
-        self.nullifier_hash = self._calculate_nullifier_hash()
-
-    def _calculate_commitment(self):
-        """Calculates the commitment for the note.
-        commitment = H(amount, secret, nullifier_secret)
-        """
-        # In a real ZK system, these would be field elements.
-        # Using a placeholder hash for Python demonstration.
-        return poseidon_hash_placeholder([
-            self.amount,
-            self.secret,
-            self.nullifier_secret
-        ])
-
-    def _calculate_nullifier_hash(self):
-        """Calculates the nullifier hash for the note.
-        nullifier_hash = H(nullifier_secret, domain_separator)
-        A domain separator (e.g., 1) is used to distinguish nullifier hashes.
-        """
-        domain_separator_nullifier = 1 
-        return poseidon_hash_placeholder([
-            self.nullifier_secret,
-            domain_separator_nullifier
-        ])
+
+        # Secrets are kept as raw bytes and only hex-encoded when serialized;
+        # secrets supplied as strings keep the string the caller sent.
+        self._secret = secret if isinstance(secret, str) else None
+        self._nullifier_secret = nullifier_secret if isinstance(nullifier_secret, str) else None
+
+        # Only notes with both secrets caller-supplied can repeat exactly
+        self._custom_secrets = secret is not None and nullifier_secret is not None
+
+        # Field element encodings, decoded once and shared by both hashes
+        self._amount_be = field_element_bytes(self.amount)
+        self._secret_b = field_element_bytes(secret) if secret is not None else _random_field_element()
+        self._nullifier_b = field_element_bytes(nullifier_secret) if nullifier_secret is not None else _random_field_element()
+
+    @property
+    def secret(self):
+        """Secret as a hex string (or the custom secret as supplied)."""
+        if self._secret is None:
+            self._secret = _to_hex(self._secret_b)
+        return self._secret
+
+    @property
+    def nullifier_secret(self):
+        """Nullifier secret as a hex string (or the custom value as supplied)."""
+        if self._nullifier_secret is None:
+            self._nullifier_secret = _to_hex(self._nullifier_b)
+        return self._nullifier_secret
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert note to dictionary for API responses"""
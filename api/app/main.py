@@ -1,11 +1,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from app.routes import router
 
 app = FastAPI(
     title="Privax ZK Note Generator API",
     description="API for generating cryptographic notes with commitments and nullifier hashes",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -1,10 +1,16 @@
 from fastapi import APIRouter, HTTPException
-from app.models import NoteRequest, NoteResponse
-from app.crypto.note import Note
+from fastapi.responses import JSONResponse
+from typing import List
+from app.models import NoteBatchRequest, NoteRequest, NoteResponse
+from app.crypto.note import Note, build_note
 
 router = APIRouter(prefix="/api/v1", tags=["notes"])
 
-@router.post("/notes", response_model=NoteResponse, summary="Generate a new note")
+# Note endpoints return ready-built dicts directly: they already have the
+# NoteResponse shape, so response_model validation is skipped and the model
+# is only declared for the OpenAPI schema. Notes carry uint256 amounts, which
+# orjson cannot encode past 64 bits, so they use the stdlib JSONResponse.
+@router.post("/notes", response_model=None, responses={200: {"model": NoteResponse}}, summary="Generate a new note")
 async def create_note(request: NoteRequest):
     """
     Create a new privacy note with the specified amount.
@@ -16,14 +22,30 @@ async def create_note(request: NoteRequest):
     Returns a note with commitment and nullifier hash.
     """
     try:
-        note = Note(
+        note = build_note(
             amount=request.amount,
             secret=request.secret,
             nullifier_secret=request.nullifier_secret
         )
-        return note.to_dict()
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Failed to create note: {str(e)}")
+    # Serialized outside the try so server-side failures are not reported as bad requests
+    return JSONResponse(note)
+
+@router.post("/notes/batch", response_model=None, responses={200: {"model": List[NoteResponse]}}, summary="Generate a batch of new notes")
+async def create_notes_batch(request: NoteBatchRequest):
+    """
+    Create one privacy note per requested amount, with freshly generated secrets.
+    
+    - **amounts**: The amount of tokens for each note (positive integers)
+    
+    Returns the notes in request order.
+    """
+    try:
+        notes = Note.batch(request.amounts)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Failed to create notes: {str(e)}")
+    return JSONResponse([note.to_dict() for note in notes])
 
 @router.get("/health", summary="Health check endpoint")
 async def health_check():
@@ -1,5 +1,6 @@
 from fastapi.testclient import TestClient
 import unittest
+from unittest import mock
 from app.main import app
 
 client = TestClient(app)
@@ -30,8 +31,8 @@ class TestAPI(unittest.TestCase):
     def test_create_note_custom_secrets(self):
         """Test creating a note with custom secrets."""
         test_amount = 300
-        test_secret = "test_secret_via_api"
-        test_nullifier = "test_nullifier_via_api"
+        test_secret = "0x2a3f1e5d8c7b9a0f6e4d2c1b0a9f8e7d"
+        test_nullifier = "7d6c5b4a3f2e1d0c9b8a7f6e5d4c3b2a"
         
         response = client.post(
             "/api/v1/notes",
@@ -48,5 +49,53 @@ class TestAPI(unittest.TestCase):
         self.assertEqual(data["secret"], test_secret)
         self.assertEqual(data["nullifier_secret"], test_nullifier)
 
+    def test_create_note_rejects_non_hex_secret(self):
+        """Test that a secret which is not a hex field element is rejected."""
+        response = client.post(
+            "/api/v1/notes",
+            json={"amount": 300, "secret": "test_secret_via_api"}
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_note_batch(self):
+        """Test creating a batch of notes through the API."""
+        test_amounts = [100, 200, 300, 400, 500]
+        response = client.post(
+            "/api/v1/notes/batch",
+            json={"amounts": test_amounts}
+        )
+        
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual([note["amount"] for note in data], test_amounts)
+        self.assertEqual(len({note["commitment"] for note in data}), len(test_amounts))
+    
+    def test_create_note_batch_rejects_empty(self):
+        """Test that an empty batch is rejected."""
+        response = client.post("/api/v1/notes/batch", json={"amounts": []})
+        self.assertEqual(response.status_code, 422)
+
+    def test_create_notes_with_uint256_amounts(self):
+        """Test that amounts wider than 64 bits, as used for 18-decimal tokens, round-trip."""
+        large_amount = 10 ** 20
+        response = client.post("/api/v1/notes", json={"amount": large_amount})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["amount"], large_amount)
+        
+        response = client.post("/api/v1/notes/batch", json={"amounts": [large_amount, 2 ** 200]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([note["amount"] for note in response.json()], [large_amount, 2 ** 200])
+        
+        # Amounts must still be field elements
+        response = client.post("/api/v1/notes", json={"amount": 2 ** 255})
+        self.assertEqual(response.status_code, 400)
+
+    def test_serialization_failure_is_server_error(self):
+        """Test that a response that cannot be serialized is a 500, not blamed on the request."""
+        server_errors = TestClient(app, raise_server_exceptions=False)
+        with mock.patch("app.routes.build_note", return_value={"amount": object()}):
+            response = server_errors.post("/api/v1/notes", json={"amount": 100})
+        self.assertEqual(response.status_code, 500)
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
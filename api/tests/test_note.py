@@ -1,5 +1,7 @@
 import unittest
-from app.crypto.note import Note
+from unittest import mock
+from app.crypto import note as note_module
+from app.crypto.note import BN254_FIELD_MODULUS, Note, build_note, poseidon_hash_placeholder
 
 class TestNote(unittest.TestCase):
     def test_note_creation(self):
@@ -16,8 +18,8 @@ class TestNote(unittest.TestCase):
     def test_note_with_custom_secrets(self):
         """Test that a note can be created with custom secrets."""
         amount = 200
-        secret = "custom_secret_for_test"
-        nullifier_secret = "custom_nullifier_secret_for_test"
+        secret = "0x2a3f1e5d8c7b9a0f6e4d2c1b0a9f8e7d"
+        nullifier_secret = "7d6c5b4a3f2e1d0c9b8a7f6e5d4c3b2a"
         
         note = Note(amount=amount, secret=secret, nullifier_secret=nullifier_secret)
         
@@ -27,5 +29,87 @@ class TestNote(unittest.TestCase):
         self.assertIsNotNone(note.commitment)
         self.assertIsNotNone(note.nullifier_hash)
 
+    def test_note_with_bytes_secrets(self):
+        """Test that raw bytes secrets are accepted and hex-encoded for output."""
+        secret = bytes.fromhex("2a3f1e5d")
+        nullifier_secret = bytes.fromhex("7d6c5b4a")
+        
+        note = Note(amount=100, secret=secret, nullifier_secret=nullifier_secret)
+        hex_note = Note(amount=100, secret="2a3f1e5d", nullifier_secret="7d6c5b4a")
+        
+        # Bytes are padded to full field elements, which is what gets hex-encoded
+        self.assertEqual(note.secret, "2a3f1e5d".rjust(64, "0"))
+        self.assertEqual(note.nullifier_secret, "7d6c5b4a".rjust(64, "0"))
+        self.assertEqual(note.commitment, hex_note.commitment)
+        self.assertEqual(note.nullifier_hash, hex_note.nullifier_hash)
+        self.assertEqual(
+            build_note(amount=100, secret=secret, nullifier_secret=nullifier_secret),
+            note.to_dict()
+        )
+
+    def test_note_batch_matches_single_notes(self):
+        """Test that batched notes hash the same as individually created ones."""
+        amounts = [1, 2, 3, 4, 5]
+        notes = Note.batch(amounts)
+        
+        self.assertEqual([note.amount for note in notes], amounts)
+        for note in notes:
+            single = Note(amount=note.amount, secret=note.secret, nullifier_secret=note.nullifier_secret)
+            self.assertEqual(note.commitment, single.commitment)
+            self.assertEqual(note.nullifier_hash, single.nullifier_hash)
+
+    def test_build_note_matches_note(self):
+        """Test that build_note produces the same dictionary as Note.to_dict."""
+        for secret, nullifier_secret in [("ab12", "cd34"), ("ab12", None), (None, "cd34")]:
+            data = build_note(amount=300, secret=secret, nullifier_secret=nullifier_secret)
+            note = Note(amount=300, secret=data["secret"], nullifier_secret=data["nullifier_secret"])
+            self.assertEqual(data, note.to_dict())
+
+    def test_hex_secret_prefix_and_padding(self):
+        """Test that 0x-prefixed and odd-length hex secrets decode as hex numbers."""
+        plain = Note(amount=100, secret="0abc", nullifier_secret="7d6c5b4a")
+        self.assertEqual(Note(amount=100, secret="0xabc", nullifier_secret="0x7d6c5b4a").commitment, plain.commitment)
+        self.assertEqual(Note(amount=100, secret="abc", nullifier_secret="7D6C5B4A").commitment, plain.commitment)
+        self.assertEqual(Note(amount=100, secret="00000abc", nullifier_secret="0x007d6c5b4a").commitment, plain.commitment)
+        self.assertEqual(Note(amount=100, secret=b"\x0a\xbc", nullifier_secret=0x7d6c5b4a).commitment, plain.commitment)
+
+    def test_invalid_secrets_rejected(self):
+        """Test that non-hex, empty, oversized and out-of-field secrets raise ValueError."""
+        modulus = BN254_FIELD_MODULUS
+        for secret in ["custom_secret_for_test", "", "0x", "ab cd", "ab" * 33, b"\x01" * 33,
+                       "ff" * 32, hex(modulus), modulus.to_bytes(32, "big"), modulus, -1]:
+            with self.subTest(secret=secret):
+                with self.assertRaises(ValueError):
+                    Note(amount=100, secret=secret, nullifier_secret="cd34")
+                with self.assertRaises(ValueError):
+                    build_note(amount=100, secret="cd34", nullifier_secret=secret)
+
+    def test_secrets_cannot_shift_between_fields(self):
+        """Test that moving bytes from one secret to the other changes the commitment."""
+        note = Note(amount=100, secret="ab", nullifier_secret="cdef")
+        shifted = Note(amount=100, secret="abcd", nullifier_secret="ef")
+        self.assertNotEqual(note.commitment, shifted.commitment)
+        self.assertNotEqual(note.nullifier_hash, shifted.nullifier_hash)
+
+    def test_hash_inputs_normalized_on_every_path(self):
+        """Test that the SHA256 fallback and the native binding decode ints, bytes and hex strings alike."""
+        forty_two = (42).to_bytes(32, "big")
+        equivalent = [[42, b"\xab\x12"], ["0x" + forty_two.hex(), "ab12"], [forty_two, "0xab12"]]
+        expected = poseidon_hash_placeholder(equivalent[0])
+        self.assertEqual([poseidon_hash_placeholder(inputs) for inputs in equivalent], [expected] * 3)
+        
+        # The native binding receives the same normalized inputs as the fallback
+        seen = []
+        def fake_poseidon(inputs):
+            seen.append(inputs)
+            return bytes(32)
+        with mock.patch.object(note_module, "poseidon_bn254", fake_poseidon):
+            for inputs in equivalent:
+                poseidon_hash_placeholder(inputs)
+        self.assertEqual(seen, [[forty_two, b"\xab\x12".rjust(32, b"\0")]] * 3)
+        
+        with self.assertRaises(ValueError):
+            poseidon_hash_placeholder(["not hex"])
+
 if __name__ == "__main__":
     unittest.main() 
\ No newline at end of file
@@ -1,4 +1,5 @@
-from fastapi import FastAPI, HTTPException, Depends, BackgroundTasks
+from fastapi import FastAPI, HTTPException, Depends
+from fastapi.responses import JSONResponse, ORJSONResponse
 from pydantic import BaseModel, Field, constr
 from typing import Optional, Dict, Any, List
 import logging
@@ -22,7 +23,8 @@ relayer = Relayer()
 app = FastAPI(
     title="Privax Relayer",
     description="API for interacting with privacy protocol relayer",
-    version="0.1.0"
+    version="0.1.0",
+    default_response_class=ORJSONResponse
 )
 
 # Initialize background listeners
@@ -60,17 +62,16 @@ class ZeroCommitmentInfo(BaseModel):
 # --- Helper functions ---
 
 async def start_blockchain_listeners():
-    """Start blockchain event listeners in the background"""
+    """Run the blockchain event listeners concurrently until they stop"""
     global ethereum_listener, solana_listener
+    listener_runs = {}
     
     # Initialize Ethereum listener if not already running
     if not ethereum_listener or not ethereum_listener.running:
         try:
             ethereum_listener = EthereumListener(relayer)
-            task = asyncio.create_task(ethereum_listener.start())
-            background_tasks.add(task)
-            task.add_done_callback(background_tasks.discard)
-            logger.info("Started Ethereum listener")
+            listener_runs["Ethereum"] = ethereum_listener.start()
+            logger.info("Starting Ethereum listener")
         except Exception as e:
             logger.error(f"Failed to start Ethereum listener: {str(e)}")
     
@@ -78,29 +79,38 @@ async def start_blockchain_listeners():
     if not solana_listener or not solana_listener.running:
         try:
             solana_listener = SolanaListener(relayer)
-            task = asyncio.create_task(solana_listener.start())
-            background_tasks.add(task)
-            task.add_done_callback(background_tasks.discard)
-            logger.info("Started Solana listener")
+            listener_runs["Solana"] = solana_listener.start()
+            logger.info("Starting Solana listener")
         except Exception as e:
             logger.error(f"Failed to start Solana listener: {str(e)}")
+    
+    # Run both listeners side by side; a failure in one must not cancel the other
+    results = await asyncio.gather(*listener_runs.values(), return_exceptions=True)
+    for name, result in zip(listener_runs, results):
+        if isinstance(result, Exception):
+            logger.error(f"{name} listener stopped with error: {str(result)}")
 
 # --- API Endpoints ---
 
 @app.on_event("startup")
 async def startup_event():
     """Start background tasks on application startup"""
-    background_tasks = BackgroundTasks()
-    background_tasks.add_task(start_blockchain_listeners)
+    task = asyncio.create_task(start_blockchain_listeners())
+    background_tasks.add(task)
+    task.add_done_callback(background_tasks.discard)
 
 @app.on_event("shutdown")
 async def shutdown_event():
     """Stop background tasks on application shutdown"""
     if ethereum_listener:
         await ethereum_listener.stop()
+        await ethereum_listener.close_session()
     if solana_listener:
         await solana_listener.stop()
     logger.info("Stopped blockchain listeners")
+    
+    # Write out any state updates still queued for disk
+    await asyncio.to_thread(relayer.persistence.flush)
 
 @app.get("/", tags=["Health"])
 async def root():
@@ -126,7 +136,8 @@ async def get_merkle_path(commitment: str):
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
-@app.post("/withdraw", tags=["Withdrawals"])
+# Withdrawals carry uint256 amounts, which orjson cannot encode past 64 bits
+@app.post("/withdraw", response_class=JSONResponse, tags=["Withdrawals"])
 async def submit_withdrawal(request: WithdrawalRequest):
     """
     Submit a withdrawal request
@@ -1,8 +1,10 @@
 import logging
 import os
 import asyncio
-from web3 import Web3
+import aiohttp
+from web3 import AsyncWeb3, AsyncHTTPProvider, WebsocketProviderV2
 from web3.exceptions import BlockNotFound
+from eth_utils import encode_hex, event_abi_to_log_topic
 
 logger = logging.getLogger(__name__)
 
@@ -32,8 +34,19 @@ CONTRACT_ABI = [
     }
 ]
 
+# Maximum number of blocks requested per eth_getLogs call
+MAX_BLOCK_RANGE = 2000
+
+# Poll interval in seconds, backed off linearly up to the maximum while idle
+POLL_INTERVAL = 15
+MAX_POLL_INTERVAL = 120
+
+# Connection pool limits for the shared RPC session
+RPC_POOL_SIZE = 4
+RPC_KEEPALIVE_TIMEOUT = 75
+
 class EthereumListener:
-    def __init__(self, relayer, rpc_url=None, contract_address=None):
+    def __init__(self, relayer, rpc_url=None, contract_address=None, ws_url=None):
         """
         Initialize Ethereum event listener
         
@@ -41,9 +54,12 @@ class EthereumListener:
             relayer: The relayer instance
             rpc_url: The Ethereum RPC URL
             contract_address: The privacy contract address
+            ws_url: Optional Ethereum websocket URL; when set, events are received
+                through a log subscription instead of polling
         """
         self.relayer = relayer
         self.rpc_url = rpc_url or os.getenv("ETH_RPC_URL")
+        self.ws_url = ws_url or os.getenv("ETH_WS_URL")
         self.contract_address = contract_address or os.getenv("ETH_CONTRACT_ADDRESS")
         
         if not self.rpc_url:
@@ -51,13 +67,35 @@ class EthereumListener:
         if not self.contract_address:
             raise ValueError("Contract address is required")
             
-        self.w3 = Web3(Web3.HTTPProvider(self.rpc_url))
+        # Async provider so RPC calls don't block the API's event loop
+        self.w3 = AsyncWeb3(AsyncHTTPProvider(self.rpc_url))
         self.contract = self.w3.eth.contract(
-            address=Web3.to_checksum_address(self.contract_address),
+            address=AsyncWeb3.to_checksum_address(self.contract_address),
             abi=CONTRACT_ABI
         )
         
+        # Event decoders and their signature topics, derived once from the ABI
+        self.deposit_event = self.contract.events.DepositOccurred()
+        self.withdrawal_event = self.contract.events.WithdrawalOccurred()
+        self.deposit_topic = event_abi_to_log_topic(self.deposit_event.abi)
+        self.withdrawal_topic = event_abi_to_log_topic(self.withdrawal_event.abi)
+        
+        # Log filter matching both events, shared by eth_getLogs and eth_subscribe
+        self.log_filter = {
+            "address": self.contract.address,
+            "topics": [[encode_hex(self.deposit_topic), encode_hex(self.withdrawal_topic)]]
+        }
+        
+        # Keep-alive HTTP session used by web3 for RPC calls, set on start()
+        # inside the event loop
+        self.session = None
+        
         self.last_processed_block = None
+        # Consecutive polls that found no events, used to back off while idle
+        self.idle_polls = 0
+        # (blockNumber, logIndex) of the last handled log, so logs seen by both
+        # the subscription and a catch-up poll are only processed once
+        self.last_processed_log = None
         self.running = False
         
     async def start(self):
@@ -69,56 +107,153 @@ class EthereumListener:
         self.running = True
         logger.info(f"Starting Ethereum event listener for contract {self.contract_address}")
         
-        # Get the latest block number as a starting point
-        self.last_processed_block = self.w3.eth.block_number
-        logger.info(f"Starting from block {self.last_processed_block}")
+        try:
+            await self.open_session()
+            
+            if self.ws_url:
+                await self.subscribe_events()
+            else:
+                await self.run_polling()
+        finally:
+            # Leave the listener restartable if it exits on an unexpected error
+            self.running = False
+    
+    async def open_session(self):
+        """Set up the keep-alive HTTP session web3 uses for RPC calls
         
+        Reusing one connection pool for every RPC call means polls don't pay a
+        new TCP/TLS handshake each time. web3 caches one session per thread and
+        endpoint for the whole process and replaces a closed one with a default
+        session, so the session stays open across listener restarts (see
+        close_session) and later starts reuse the one already cached.
+        """
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=RPC_POOL_SIZE, keepalive_timeout=RPC_KEEPALIVE_TIMEOUT)
+        )
+        self.session = await self.w3.provider.cache_async_session(session)
+        if self.session is not session:
+            await session.close()
+            if self.session.connector.limit != RPC_POOL_SIZE:
+                logger.warning("web3 already holds an RPC session for this endpoint; its pool settings are used")
+    
+    async def run_polling(self):
+        """Poll for events until stopped"""
         while self.running:
             try:
-                await self.poll_events()
-                await asyncio.sleep(15)  # Poll every 15 seconds
+                if await self.poll_events():
+                    self.idle_polls = 0
+                else:
+                    self.idle_polls += 1
+                await asyncio.sleep(min(POLL_INTERVAL * (1 + self.idle_polls), MAX_POLL_INTERVAL))
             except Exception as e:
                 logger.error(f"Error polling Ethereum events: {str(e)}")
                 await asyncio.sleep(30)  # Longer delay on error
     
+    async def subscribe_events(self):
+        """Receive events through a websocket log subscription until stopped, reconnecting on errors"""
+        while self.running:
+            try:
+                async with AsyncWeb3.persistent_websocket(WebsocketProviderV2(self.ws_url)) as ws_w3:
+                    await ws_w3.eth.subscribe("logs", self.log_filter)
+                    logger.info("Subscribed to Ethereum contract logs")
+                    
+                    # Catch up on blocks produced while not subscribed
+                    await self.poll_events()
+                    
+                    while self.running:
+                        try:
+                            async for log in ws_w3.listen_to_websocket():
+                                await self.process_log(log)
+                                # Logs arrive in chain order, so every block before this
+                                # one is complete and a catch-up poll after a reconnect
+                                # only needs to fetch from this block on
+                                self.last_processed_block = max(self.last_processed_block, log['blockNumber'] - 1)
+                        except asyncio.TimeoutError:
+                            # No message within the provider's receive timeout; keep listening
+                            continue
+            except Exception as e:
+                logger.error(f"Error in Ethereum log subscription: {str(e)}")
+                await asyncio.sleep(30)  # Longer delay on error
+    
     async def stop(self):
         """Stop listening for events"""
         logger.info("Stopping Ethereum event listener")
         self.running = False
     
+    async def close_session(self):
+        """Close the RPC session on application shutdown
+        
+        The session is cached by web3 for the whole process, so it is kept open
+        when the listener stops; a listener started after this gets a default
+        web3 session instead.
+        """
+        if self.session:
+            session, self.session = self.session, None
+            await session.close()
+    
     async def poll_events(self):
-        """Poll for new events"""
-        current_block = self.w3.eth.block_number
+        """
+        Poll for new events
+        
+        Returns:
+            int: Number of logs received
+        """
+        current_block = await self.w3.eth.block_number
+        
+        # The first successful poll only records the latest block as the starting
+        # point; it runs inside the retry loops so a failed RPC at start-up is retried
+        if self.last_processed_block is None:
+            self.last_processed_block = current_block
+            logger.info(f"Starting from block {self.last_processed_block}")
+            return 0
         
         if current_block <= self.last_processed_block:
             logger.debug(f"No new blocks to process (current: {current_block}, last: {self.last_processed_block})")
-            return
+            return 0
         
         logger.info(f"Processing blocks {self.last_processed_block + 1} to {current_block}")
         
-        # Get deposit events
-        deposit_filter = self.contract.events.DepositOccurred.create_filter(
-            fromBlock=self.last_processed_block + 1,
-            toBlock=current_block
-        )
+        # Fetch both event types in one eth_getLogs call per block range,
+        # splitting large gaps so a single request stays within provider limits
+        received = 0
+        from_block = self.last_processed_block + 1
+        while from_block <= current_block:
+            to_block = min(from_block + MAX_BLOCK_RANGE - 1, current_block)
+            logs = await self.w3.eth.get_logs({
+                **self.log_filter,
+                "fromBlock": from_block,
+                "toBlock": to_block
+            })
+            
+            for log in logs:
+                await self.process_log(log)
+            received += len(logs)
+            
+            self.last_processed_block = to_block
+            from_block = to_block + 1
         
-        # Get withdrawal events
-        withdrawal_filter = self.contract.events.WithdrawalOccurred.create_filter(
-            fromBlock=self.last_processed_block + 1,
-            toBlock=current_block
-        )
+        return received
+    
+    async def process_log(self, log):
+        """Decode a raw contract log and dispatch it by its event topic"""
+        if log.get('removed'):
+            logger.warning(f"Ignoring log removed by chain reorganization in block {log['blockNumber']}")
+            return
         
-        # Process deposit events
-        for event in deposit_filter.get_all_entries():
+        position = (log['blockNumber'], log['logIndex'])
+        if self.last_processed_log is not None and position <= self.last_processed_log:
+            return
+        self.last_processed_log = position
+        
+        topic = log['topics'][0]
+        if topic == self.deposit_topic:
+            event = self.deposit_event.process_log(log)
             logger.info(f"Received deposit event in block {event['blockNumber']}")
             await self.process_deposit_event(event)
-        
-        # Process withdrawal events
-        for event in withdrawal_filter.get_all_entries():
+        elif topic == self.withdrawal_topic:
+            event = self.withdrawal_event.process_log(log)
             logger.info(f"Received withdrawal event in block {event['blockNumber']}")
             await self.process_withdrawal_event(event)
-        
-        self.last_processed_block = current_block
     
     async def process_deposit_event(self, event):
         """Process a deposit event"""
@@ -5,6 +5,10 @@ import json
 
 logger = logging.getLogger(__name__)
 
+# Poll interval in seconds, backed off linearly up to the maximum while idle
+POLL_INTERVAL = 5
+MAX_POLL_INTERVAL = 30
+
 class SolanaListener:
     def __init__(self, relayer, rpc_url=None, program_id=None):
         """
@@ -25,6 +29,8 @@ class SolanaListener:
             raise ValueError("Solana program ID is required")
             
         self.last_signature = None
+        # Consecutive polls that found no events, used to back off while idle
+        self.idle_polls = 0
         self.running = False
         
         # In a real implementation, you would use a Solana client library
@@ -46,8 +52,11 @@ class SolanaListener:
         
         while self.running:
             try:
-                await self.poll_events()
-                await asyncio.sleep(5)  # Poll every 5 seconds
+                if await self.poll_events():
+                    self.idle_polls = 0
+                else:
+                    self.idle_polls += 1
+                await asyncio.sleep(min(POLL_INTERVAL * (1 + self.idle_polls), MAX_POLL_INTERVAL))
             except Exception as e:
                 logger.error(f"Error polling Solana events: {str(e)}")
                 await asyncio.sleep(30)  # Longer delay on error
@@ -65,6 +74,9 @@ class SolanaListener:
         1. Use getProgramAccounts or getSignaturesForAddress to fetch transactions
         2. Parse transaction logs to identify deposit and withdrawal events
         3. Extract relevant data and forward to the relayer
+        
+        Returns:
+            int: Number of events received
         """
         # Placeholder implementation
         # In a real implementation, you would fetch new transactions and parse them
@@ -86,7 +98,7 @@ class SolanaListener:
         #
         #     self.last_signature = signature
         
-        pass
+        return 0
     
     async def process_deposit_event(self, event_data):
         """
@@ -1,94 +1,229 @@
 #!/usr/bin/env python3
 import hashlib
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Numba-compiled SHA256 over the whole level, parallel across pairs.
+# level_hash(buf, n_pairs) hashes n_pairs concatenated 64-byte inputs and
+# returns the n_pairs 32-byte digests concatenated. Importing numba takes a
+# few hundred milliseconds, so it is only loaded once a level is wide enough
+# to use it (see _load_level_hash); None until then or without numba.
+level_hash = None
+_level_hash_loaded = False
+
+def _load_level_hash():
+    """Imports level_hash on first use, returning None if numba is not installed."""
+    global level_hash, _level_hash_loaded
+    if not _level_hash_loaded:
+        _level_hash_loaded = True
+        try:
+            from .merkle_numba import level_hash
+        except ImportError:
+            logger.debug("numba is not installed, hashing Merkle levels with hashlib")
+    return level_hash
+
+# Size of a tree node (SHA256 digest) in bytes
+NODE_SIZE = 32
+
+# Minimum number of pairs in a level for a level_hash call to beat the hashlib loop
+LEVEL_HASH_MIN_PAIRS = 8
+
 # --- Hash Function (SHA256 for Python simplicity) ---
-def hash_func(input_string):
-    """Computes SHA256 hash of a string and returns hex digest."""
-    return hashlib.sha256(input_string.encode("utf-8")).hexdigest()
+_sha256 = hashlib.sha256
 
-def hash_pair(left_hex, right_hex):
-    """Hashes a pair of hex strings. Order matters.
-    Concatenates them before hashing.
+def hash_func(data, _sha256=_sha256):
+    """Computes SHA256 hash of raw bytes and returns the raw digest."""
+    return _sha256(data).digest()
+
+def hash_pair(left, right, _sha256=_sha256):
+    """Hashes a pair of 32-byte nodes. Order matters.
+    Concatenates the raw bytes (left + right) and returns the raw digest.
+    The constructor is bound as a default argument so the hot loops skip
+    the global and attribute lookups on every call.
+    """
+    return _sha256(left + right).digest()
+
+def hash_bytes(value):
+    """Decodes a 32-byte hash given as a hex string (optionally 0x-prefixed) or as raw bytes.
+    Raises ValueError for anything else.
     """
-    # Ensure consistent ordering or a separator if order doesn't inherently matter
-    # For Merkle trees, order of concatenation is usually fixed (e.g., left + right)
-    return hash_func(left_hex + right_hex)
+    if isinstance(value, str):
+        value = bytes.fromhex(value[2:] if value.startswith("0x") else value)
+    elif not isinstance(value, (bytes, bytearray)):
+        raise ValueError("Hash must be a hex string or bytes.")
+    if len(value) != NODE_SIZE:
+        raise ValueError(f"Hash must be {NODE_SIZE} bytes long.")
+    return bytes(value)
+
+# Default zero commitment - used as the first leaf of the tree and as the
+# value of empty leaves
+ZERO_LEAF = hash_func(b"zero_commitment")
+ZERO_COMMITMENT = ZERO_LEAF.hex()
 
-# Default zero commitment - used as the first leaf of the tree
-ZERO_COMMITMENT = hash_func("zero_commitment")
+# Depth of the Merkle tree, matching the withdraw circuit's `levels`
+TREE_HEIGHT = 20
+
+# Number of Merkle paths cached per tree; the cache is cleared whenever a leaf is added
+PATH_CACHE_SIZE = 1024
+
+# ZERO_HASHES[level] is the root of an empty subtree of that height:
+# ZERO_HASHES[level] = hash_pair(ZERO_HASHES[level - 1], ZERO_HASHES[level - 1])
+ZERO_HASHES = [ZERO_LEAF]
+for _ in range(TREE_HEIGHT):
+    ZERO_HASHES.append(hash_pair(ZERO_HASHES[-1], ZERO_HASHES[-1]))
+# Hex form of ZERO_HASHES, for the empty siblings in Merkle paths
+ZERO_HASHES_HEX = [zero_hash.hex() for zero_hash in ZERO_HASHES]
 
 class MerkleTree:
     def __init__(self, initialize_with_zero=True):
         """
-        Initialize a new Merkle tree
+        Initialize a new fixed-height Merkle tree
+        
+        Empty leaves hold ZERO_COMMITMENT, so the root always covers
+        2**TREE_HEIGHT leaves and every path has TREE_HEIGHT elements.
+        Nodes are stored as raw 32-byte digests; hex strings are only used
+        at the public API boundary.
         
         Args:
             initialize_with_zero: If True, initializes the tree with a zero commitment
         """
-        self.leaves = []  # Store the actual leaf values (commitments)
-        self.tree_levels = [] # Stores all levels of the tree, tree_levels[0] are leaves (hashed), tree_levels[-1] is the root
+        self.leaf_to_index = {}  # Maps each leaf value (commitment) to the index of its first occurrence
+        # Stores all levels of the tree, tree_levels[0] are the leaves, tree_levels[-1] holds the root.
+        # Each level is a bytearray of packed NODE_SIZE-byte nodes, so node i is
+        # level[i * NODE_SIZE:(i + 1) * NODE_SIZE]. Levels only hold filled nodes and
+        # are updated in place; anything past the end of a level is an empty
+        # subtree (see zero_hashes).
+        self.tree_levels = [bytearray() for _ in range(TREE_HEIGHT + 1)]
         self.merkle_root = None
         
+        # Empty subtree roots, shared by all trees
+        self.zero_hashes = ZERO_HASHES
+        self.zero_hashes_hex = ZERO_HASHES_HEX
+        
+        # Paths only change when the tree grows, so repeated queries for the
+        # same leaf (e.g. clients polling before proving) are served from here
+        self._cached_merkle_path = lru_cache(maxsize=PATH_CACHE_SIZE)(self._compute_merkle_path)
+        
         # Initialize with a zero commitment if requested
         if initialize_with_zero:
             self.add_leaf(ZERO_COMMITMENT)
             logger.info(f"Initialized Merkle tree with zero commitment: {ZERO_COMMITMENT[:10]}...")
 
-    def _calculate_next_level(self, current_level_nodes):
-        """Calculates the next level of the Merkle tree from the current level."""
-        next_level = []
-        num_nodes = len(current_level_nodes)
-        for i in range(0, num_nodes, 2):
-            left_child = current_level_nodes[i]
-            if i + 1 < num_nodes:
-                right_child = current_level_nodes[i+1]
-            else:
-                # Handle odd number of nodes by duplicating the last one
-                right_child = left_child 
-            parent = hash_pair(left_child, right_child)
-            next_level.append(parent)
+    @property
+    def leaf_count(self):
+        """Number of leaves in the tree."""
+        return len(self.tree_levels[0]) // NODE_SIZE
+
+    def _calculate_next_level(self, current_level_nodes, level):
+        """Calculates the next level of the Merkle tree from the current level.
+        A missing right sibling is the empty subtree hash for that level.
+        Wide levels are hashed in one level_hash call when numba is
+        available.
+        """
+        num_nodes = len(current_level_nodes) // NODE_SIZE
+        num_pairs = (num_nodes + 1) // 2
+        if num_nodes % 2:
+            current_level_nodes = current_level_nodes + self.zero_hashes[level]
+        if num_pairs >= LEVEL_HASH_MIN_PAIRS:
+            hash_level = _load_level_hash()
+            if hash_level is not None:
+                return bytearray(hash_level(current_level_nodes, num_pairs))
+        
+        # Both children of a parent are adjacent, so each pair is hashed
+        # straight out of the level without copying the nodes
+        next_level = bytearray()
+        with memoryview(current_level_nodes) as nodes:
+            for i in range(0, num_pairs * 2 * NODE_SIZE, 2 * NODE_SIZE):
+                next_level += hash_func(nodes[i:i + 2 * NODE_SIZE])
         return next_level
 
-    def add_leaf(self, leaf_value_hex):
-        """Adds a new leaf (commitment) to the tree and rebuilds it."""
-        if not isinstance(leaf_value_hex, str):
-            raise ValueError("Leaf value must be a hex string.")
+    @staticmethod
+    def _leaf_bytes(leaf_value):
+        """Decodes a leaf value (hex string or raw bytes) into its raw bytes."""
+        try:
+            return hash_bytes(leaf_value)
+        except ValueError:
+            raise ValueError(f"Leaf value must be a {NODE_SIZE}-byte hex string or bytes.")
+
+    def add_leaf(self, leaf_value):
+        """Adds a new leaf (commitment), as a hex string or raw bytes, to the tree.
+        Only the nodes on the path from the new leaf to the root are
+        rehashed and written into the cached levels.
+        """
+        leaf = self._leaf_bytes(leaf_value)
+        current_index = self.leaf_count
+        if current_index >= 2 ** TREE_HEIGHT:
+            raise ValueError("Merkle tree is full.")
         
-        self.leaves.append(leaf_value_hex)
+        self.leaf_to_index.setdefault(leaf, current_index)
+        self._cached_merkle_path.cache_clear()
+        current_hash = leaf
+        for level, nodes in enumerate(self.tree_levels):
+            # Append the new node or overwrite the existing rightmost one
+            offset = current_index * NODE_SIZE
+            if offset < len(nodes):
+                nodes[offset:offset + NODE_SIZE] = current_hash
+            else:
+                nodes += current_hash
+            if level == TREE_HEIGHT:
+                break
+            
+            if current_index & 1:
+                # Right child: the stored left sibling sits right before it, so the pair is hashed in place
+                current_hash = hash_func(nodes[offset - NODE_SIZE:offset + NODE_SIZE])
+            else:
+                # Left child: the new node is the last one, so its right sibling is still empty
+                current_hash = hash_pair(current_hash, self.zero_hashes[level])
+            current_index >>= 1
         
-        # Rebuild the tree
-        if not self.leaves:
-            self.tree_levels = []
-            self.merkle_root = None
-            return
-
-        # For this simple Merkle tree, we'll hash the leaf values themselves if they aren't already hashes.
-        # Assuming leaf_value_hex is the commitment itself, which is already a hash.
-        current_level_nodes = list(self.leaves) 
-        self.tree_levels = [current_level_nodes]
+        self.merkle_root = current_hash
 
-        while len(current_level_nodes) > 1:
-            current_level_nodes = self._calculate_next_level(current_level_nodes)
-            self.tree_levels.append(current_level_nodes)
+    def add_leaves(self, leaf_values):
+        """Adds several leaves (commitments), as hex strings or raw bytes, at once.
+        Each level is rebuilt in a single pass, which is cheaper than repeated
+        add_leaf calls when loading a persisted tree.
+        """
+        new_leaves = [self._leaf_bytes(leaf_value) for leaf_value in leaf_values]
+        if not new_leaves:
+            return
+        if self.leaf_count + len(new_leaves) > 2 ** TREE_HEIGHT:
+            raise ValueError("Merkle tree is full.")
         
-        if current_level_nodes:
-            self.merkle_root = current_level_nodes[0]
-        else:
-            self.merkle_root = None # Should not happen if leaves is not empty
+        for index, leaf in enumerate(new_leaves, start=self.leaf_count):
+            self.leaf_to_index.setdefault(leaf, index)
+        self._cached_merkle_path.cache_clear()
+        self.tree_levels[0] += b"".join(new_leaves)
+        current_level_nodes = self.tree_levels[0]
+        for level in range(TREE_HEIGHT):
+            current_level_nodes = self._calculate_next_level(current_level_nodes, level)
+            self.tree_levels[level + 1] = current_level_nodes
+        
+        self.merkle_root = bytes(current_level_nodes)
 
     def get_merkle_root(self):
-        """Returns the current Merkle root of the tree."""
-        return self.merkle_root
+        """Returns the current Merkle root of the tree as a hex string."""
+        return self.merkle_root.hex() if self.merkle_root is not None else None
 
     def get_merkle_path(self, leaf_value_hex):
-        """Returns the Merkle path (siblings) and path indices for a given leaf value."""
-        if leaf_value_hex not in self.leaves:
+        """Returns the Merkle path (siblings, as hex strings) and path indices for a given leaf value."""
+        try:
+            leaf = hash_bytes(leaf_value_hex)
+        except ValueError:
             raise ValueError("Leaf value not found in the tree.")
+        leaf_index, path_elements, path_indices = self._cached_merkle_path(leaf)
+        return {
+            "leaf_index": leaf_index,
+            "path_elements": list(path_elements), # These are the siblings
+            "path_indices": list(path_indices)    # These indicate if the current path node was left (0) or right (1)
+        }
 
-        leaf_index = self.leaves.index(leaf_value_hex)
+    def _compute_merkle_path(self, leaf):
+        """Computes the Merkle path of a raw leaf value as (leaf_index, path_elements, path_indices)."""
+        leaf_index = self.leaf_to_index.get(leaf)
+        if leaf_index is None:
+            raise ValueError("Leaf value not found in the tree.")
         
         path_elements = []
         path_indices = [] # 0 for left, 1 for right (relative to the path element)
@@ -96,30 +231,22 @@ class MerkleTree:
         current_index_in_level = leaf_index
         
         # Iterate from the leaf level up to the level just below the root
-        for i in range(len(self.tree_levels) - 1):
-            current_level_nodes = self.tree_levels[i]
-            level_node_count = len(current_level_nodes)
+        for level in range(TREE_HEIGHT):
+            current_level_nodes = self.tree_levels[level]
             
-            is_right_node = current_index_in_level % 2 != 0
+            # The sibling differs from the current node only in the lowest index bit,
+            # which is also 1 if the current node is a right child (0 for left)
+            sibling_index = current_index_in_level ^ 1
+            path_indices.append(current_index_in_level & 1)
             
-            if is_right_node:
-                # Current node is a right child, sibling is to the left
-                sibling_index = current_index_in_level - 1
-                path_indices.append(1) # The leaf/current_hash is on the right of its sibling
+            # Siblings past the last filled node are empty subtrees
+            offset = sibling_index * NODE_SIZE
+            if offset < len(current_level_nodes):
+                path_elements.append(current_level_nodes[offset:offset + NODE_SIZE].hex())
             else:
-                # Current node is a left child, sibling is to the right
-                sibling_index = current_index_in_level + 1
-                # If the sibling index is out of bounds (odd number of nodes, last one duplicated for hashing)
-                # the sibling is the node itself (as it was duplicated for hashing with itself)
-                if sibling_index >= level_node_count:
-                    sibling_index = current_index_in_level # its own hash was used as sibling
-                path_indices.append(0) # The leaf/current_hash is on the left of its sibling
+                path_elements.append(self.zero_hashes_hex[level])
             
-            path_elements.append(current_level_nodes[sibling_index])
-            current_index_in_level //= 2 # Move to the parent's index in the next level
+            current_index_in_level >>= 1 # Move to the parent's index in the next level
             
-        return {
-            "leaf_index": leaf_index,
-            "path_elements": path_elements, # These are the siblings
-            "path_indices": path_indices    # These indicate if the current path node was left (0) or right (1)
-        } 
\ No newline at end of file
+        # Tuples, so cached paths cannot be modified through a returned result
+        return leaf_index, tuple(path_elements), tuple(path_indices)
\ No newline at end of file
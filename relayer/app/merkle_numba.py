@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Numba-compiled SHA256 for hashing whole Merkle tree levels.
+
+Provides level_hash(buf, n_pairs): buf holds n_pairs concatenated 64-byte
+inputs (left + right child) and the n_pairs 32-byte digests are returned
+concatenated. Importing this module raises ImportError when numba is not
+installed, so callers can fall back to hashlib.
+"""
+import numpy as np
+from numba import njit, prange
+
+_MASK = 0xFFFFFFFF
+
+_K = np.array([
+    0x428a2f98, 0x71374491, 0xb5c0fbcf, 0xe9b5dba5, 0x3956c25b, 0x59f111f1, 0x923f82a4, 0xab1c5ed5,
+    0xd807aa98, 0x12835b01, 0x243185be, 0x550c7dc3, 0x72be5d74, 0x80deb1fe, 0x9bdc06a7, 0xc19bf174,
+    0xe49b69c1, 0xefbe4786, 0x0fc19dc6, 0x240ca1cc, 0x2de92c6f, 0x4a7484aa, 0x5cb0a9dc, 0x76f988da,
+    0x983e5152, 0xa831c66d, 0xb00327c8, 0xbf597fc7, 0xc6e00bf3, 0xd5a79147, 0x06ca6351, 0x14292967,
+    0x27b70a85, 0x2e1b2138, 0x4d2c6dfc, 0x53380d13, 0x650a7354, 0x766a0abb, 0x81c2c92e, 0x92722c85,
+    0xa2bfe8a1, 0xa81a664b, 0xc24b8b70, 0xc76c51a3, 0xd192e819, 0xd6990624, 0xf40e3585, 0x106aa070,
+    0x19a4c116, 0x1e376c08, 0x2748774c, 0x34b0bcb5, 0x391c0cb3, 0x4ed8aa4a, 0x5b9cca4f, 0x682e6ff3,
+    0x748f82ee, 0x78a5636f, 0x84c87814, 0x8cc70208, 0x90befffa, 0xa4506ceb, 0xbef9a3f7, 0xc67178f2,
+], dtype=np.int64)
+
+_H0 = np.array([
+    0x6a09e667, 0xbb67ae85, 0x3c6ef372, 0xa54ff53a, 0x510e527f, 0x9b05688c, 0x1f83d9ab, 0x5be0cd19,
+], dtype=np.int64)
+
+
+@njit(cache=True, inline="always")
+def _rotr(x, n):
+    return ((x >> n) | (x << (32 - n))) & _MASK
+
+
+@njit(cache=True)
+def _expand(w):
+    """Extends the first 16 words of w into the full 64-word message schedule."""
+    for t in range(16, 64):
+        s0 = _rotr(w[t - 15], 7) ^ _rotr(w[t - 15], 18) ^ (w[t - 15] >> 3)
+        s1 = _rotr(w[t - 2], 17) ^ _rotr(w[t - 2], 19) ^ (w[t - 2] >> 10)
+        w[t] = (w[t - 16] + s0 + w[t - 7] + s1) & _MASK
+
+
+@njit(cache=True)
+def _compress(state, w):
+    """Runs the 64 SHA256 rounds over the schedule w and adds the result into state."""
+    a, b, c, d, e, f, g, h = state[0], state[1], state[2], state[3], state[4], state[5], state[6], state[7]
+    for t in range(64):
+        s1 = _rotr(e, 6) ^ _rotr(e, 11) ^ _rotr(e, 25)
+        ch = (e & f) ^ (~e & g)
+        t1 = (h + s1 + ch + _K[t] + w[t]) & _MASK
+        s0 = _rotr(a, 2) ^ _rotr(a, 13) ^ _rotr(a, 22)
+        maj = (a & b) ^ (a & c) ^ (b & c)
+        t2 = (s0 + maj) & _MASK
+        h = g
+        g = f
+        f = e
+        e = (d + t1) & _MASK
+        d = c
+        c = b
+        b = a
+        a = (t1 + t2) & _MASK
+    state[0] = (state[0] + a) & _MASK
+    state[1] = (state[1] + b) & _MASK
+    state[2] = (state[2] + c) & _MASK
+    state[3] = (state[3] + d) & _MASK
+    state[4] = (state[4] + e) & _MASK
+    state[5] = (state[5] + f) & _MASK
+    state[6] = (state[6] + g) & _MASK
+    state[7] = (state[7] + h) & _MASK
+
+
+def _padding_schedule():
+    """Message schedule of the padding block that follows every 64-byte input."""
+    w = np.zeros(64, dtype=np.int64)
+    w[0] = 0x80000000
+    w[15] = 512  # message length in bits
+    _expand(w)
+    return w
+
+
+# Every input is exactly 64 bytes, so the second block is always the same
+_W_PAD = _padding_schedule()
+
+
+@njit(parallel=True, cache=True)
+def _hash_pairs(data, out, w_pad):
+    for i in prange(out.shape[0] // 32):
+        w = np.empty(64, dtype=np.int64)
+        base = i * 64
+        for t in range(16):
+            j = base + t * 4
+            w[t] = (np.int64(data[j]) << 24) | (np.int64(data[j + 1]) << 16) | (np.int64(data[j + 2]) << 8) | np.int64(data[j + 3])
+        _expand(w)
+        state = _H0.copy()
+        _compress(state, w)
+        _compress(state, w_pad)
+        for t in range(8):
+            j = i * 32 + t * 4
+            out[j] = (state[t] >> 24) & 0xFF
+            out[j + 1] = (state[t] >> 16) & 0xFF
+            out[j + 2] = (state[t] >> 8) & 0xFF
+            out[j + 3] = state[t] & 0xFF
+
+
+def level_hash(buf, n_pairs):
+    """Hashes n_pairs concatenated 64-byte inputs, returning the concatenated digests."""
+    data = np.frombuffer(buf, dtype=np.uint8, count=n_pairs * 64)
+    out = np.empty(n_pairs * 32, dtype=np.uint8)
+    _hash_pairs(data, out, _W_PAD)
+    return out.tobytes()
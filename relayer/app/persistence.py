@@ -1,12 +1,56 @@
 import os
 import json
 import logging
+import mmap
+import queue
+import threading
+import time
 from pathlib import Path
 
+import orjson
+
+from .merkle import NODE_SIZE, hash_bytes
+
 logger = logging.getLogger(__name__)
 
+# Number of records appended to the logs before they are folded into the snapshots
+COMPACTION_THRESHOLD = 1000
+
+# Seconds the writer thread waits after an update so that a burst is written in one batch
+WRITE_COALESCE_INTERVAL = 0.05
+
+def _dumps(obj):
+    """Serializes obj to JSON bytes.
+    orjson cannot encode integers wider than 64 bits, so records holding
+    larger token amounts fall back to the json module.
+    """
+    try:
+        return orjson.dumps(obj)
+    except TypeError:
+        return json.dumps(obj).encode("utf-8")
+
+# orjson decodes integers wider than 64 bits as floats, so deposits and
+# withdrawals, which carry token amounts, are decoded with the json module.
+_load_amounts = json.loads
+
 class RelayerPersistence:
-    """Handles persistence of relayer state to disk"""
+    """Handles persistence of relayer state to disk
+    
+    Leaves and used nullifiers are stored as packed 32-byte records
+    (leaves.bin, nullifiers.bin), so persisting a new one is a 32-byte append.
+    
+    Deposits and withdrawals each have a JSON snapshot (e.g. deposits.json)
+    and an append-only log next to it (e.g. deposits.log) holding one JSON
+    record per line. Updates only append to the log; loading replays the log
+    on top of the snapshot. Once the logs hold COMPACTION_THRESHOLD records
+    they are folded into new snapshots, which are written atomically.
+    Replaying a record that is already in the snapshot is a no-op, so a crash
+    during compaction cannot corrupt the state.
+    
+    Appends are handed to a background writer thread, which batches the
+    updates of a burst into one write per file, so callers never wait on
+    disk. Call flush() to wait until everything queued has been written.
+    """
     
     def __init__(self, data_dir="./data"):
         """
@@ -18,75 +62,208 @@ class RelayerPersistence:
         self.data_dir = Path(data_dir)
         self.data_dir.mkdir(exist_ok=True, parents=True)
         
-        self.nullifiers_file = self.data_dir / "nullifiers.json"
-        self.leaves_file = self.data_dir / "leaves.json"
+        self.nullifiers_file = self.data_dir / "nullifiers.bin"
+        self.leaves_file = self.data_dir / "leaves.bin"
         self.deposits_file = self.data_dir / "deposits.json"
         self.withdrawals_file = self.data_dir / "withdrawals.json"
         
+        self.deposits_log = self.data_dir / "deposits.log"
+        self.withdrawals_log = self.data_dir / "withdrawals.log"
+        
+        # JSON files from before leaves and nullifiers were packed; migrated on load
+        self.legacy_nullifiers_file = self.data_dir / "nullifiers.json"
+        self.legacy_leaves_file = self.data_dir / "leaves.json"
+        
+        # Records currently in the logs, used to decide when to compact
+        for log in (self.deposits_log, self.withdrawals_log):
+            self._truncate_partial_line(log)
+        self.log_records = sum(len(self._read_log(log)) for log in (self.deposits_log, self.withdrawals_log))
+        
+        # Pending (path, bytes) appends, written by the writer thread
+        self.pending_writes = queue.Queue()
+        self.writer = threading.Thread(target=self._write_loop, name="persistence-writer", daemon=True)
+        self.writer.start()
+        
         logger.info(f"Persistence initialized with data directory: {self.data_dir}")
 
-    def save_nullifiers(self, nullifiers):
+    def _write_snapshot(self, path, obj):
+        """Atomically replaces a snapshot file with obj."""
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(_dumps(obj))
+        os.replace(tmp_path, path)
+
+    def _read_snapshot(self, path, default, loads=orjson.loads):
+        """Reads a snapshot file, returning default if it does not exist."""
+        if not path.exists():
+            return default
+        with open(path, "rb") as f:
+            return loads(f.read())
+
+    def _read_log(self, path, loads=orjson.loads):
+        """Reads the records of a log, skipping lines torn by a crash mid-write."""
+        if not path.exists():
+            return []
+        records = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    records.append(loads(line))
+                except ValueError:
+                    logger.warning(f"Skipping incomplete record in {path}")
+        return records
+
+    def _truncate_partial_line(self, path):
+        """Truncates a log back to its last complete line.
+        A record torn by a crash mid-append has no trailing newline, so the
+        next append would be joined onto it and lost along with it.
         """
-        Save the used nullifiers set to disk
+        if not path.exists() or path.stat().st_size == 0:
+            return
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            total_size = len(data)
+            size = data.rfind(b"\n") + 1
+        if size != total_size:
+            logger.warning(f"Truncating incomplete record at the end of {path}")
+            os.truncate(path, size)
+
+    def _append(self, path, data):
+        """Queues data to be appended to path by the writer thread."""
+        self.pending_writes.put((path, data))
+
+    def _write_loop(self):
+        """Writes queued appends, coalescing each burst into one write per file."""
+        while True:
+            batch = [self.pending_writes.get()]
+            time.sleep(WRITE_COALESCE_INTERVAL)
+            while True:
+                try:
+                    batch.append(self.pending_writes.get_nowait())
+                except queue.Empty:
+                    break
+            
+            chunks = {}
+            for path, data in batch:
+                chunks.setdefault(path, []).append(data)
+            for path, data in chunks.items():
+                try:
+                    with open(path, "ab") as f:
+                        f.write(b"".join(data))
+                except Exception as e:
+                    logger.error(f"Error writing to {path}: {str(e)}")
+            
+            self.log_records += len(chunks.get(self.deposits_log, ())) + len(chunks.get(self.withdrawals_log, ()))
+            if self.log_records >= COMPACTION_THRESHOLD:
+                self.compact()
+            for _ in batch:
+                self.pending_writes.task_done()
+
+    def flush(self):
+        """Blocks until all queued appends have been written to disk."""
+        self.pending_writes.join()
+
+    def compact(self):
+        """Folds all logs into their snapshots and removes the logs.
+        Runs on the writer thread, after the appends queued so far are written.
+        """
+        try:
+            self.save_deposits(self.load_deposits())
+            self.save_withdrawals(self.load_withdrawals())
+            self.log_records = 0
+            logger.debug(f"Compacted persistence logs in {self.data_dir}")
+        except Exception as e:
+            logger.error(f"Error compacting persistence logs: {str(e)}")
+
+    def _read_records(self, path):
+        """Reads a packed file of 32-byte records.
+        The file is memory-mapped and sliced straight into records, so it is
+        never copied into one large intermediate buffer. A partial record left
+        by a crash mid-append is truncated away so that later appends stay
+        aligned.
+        """
+        if not path.exists() or path.stat().st_size == 0:
+            return []
+        with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            total_size = len(data)
+            size = total_size - total_size % NODE_SIZE
+            records = [data[i:i + NODE_SIZE] for i in range(0, size, NODE_SIZE)]
+        if size != total_size:
+            logger.warning(f"Truncating incomplete record at the end of {path}")
+            os.truncate(path, size)
+        return records
+
+    def _migrate_json_hashes(self, path, legacy_file, hashes_hex):
+        """Packs hex hashes read from a legacy JSON file into path and removes that file."""
+        records = []
+        for hash_hex in hashes_hex:
+            try:
+                records.append(hash_bytes(hash_hex))
+            except ValueError:
+                logger.warning(f"Dropping invalid hash {hash_hex!r} while migrating to {path}")
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(records))
+        os.replace(tmp_path, path)
+        legacy_file.unlink()
+        logger.info(f"Migrated {len(records)} records to {path}")
+        return records
+
+    def append_nullifier(self, nullifier):
+        """
+        Append a used nullifier hash to the nullifiers file
         
         Args:
-            nullifiers: Set of used nullifier hashes
+            nullifier: The used nullifier hash, as 32 raw bytes
         """
         try:
-            with open(self.nullifiers_file, "w") as f:
-                json.dump(list(nullifiers), f)
-            logger.debug(f"Saved {len(nullifiers)} nullifiers to {self.nullifiers_file}")
+            self._append(self.nullifiers_file, nullifier)
         except Exception as e:
-            logger.error(f"Error saving nullifiers: {str(e)}")
+            logger.error(f"Error appending nullifier: {str(e)}")
 
     def load_nullifiers(self):
         """
         Load the used nullifiers set from disk
         
         Returns:
-            Set of used nullifier hashes
+            Set of used nullifier hashes, as 32 raw bytes each
         """
-        if not self.nullifiers_file.exists():
-            logger.debug(f"Nullifiers file {self.nullifiers_file} does not exist, returning empty set")
-            return set()
-        
         try:
-            with open(self.nullifiers_file, "r") as f:
-                nullifiers = set(json.load(f))
+            if not self.nullifiers_file.exists() and self.legacy_nullifiers_file.exists():
+                nullifiers = self._read_snapshot(self.legacy_nullifiers_file, [])
+                nullifiers = set(self._migrate_json_hashes(self.nullifiers_file, self.legacy_nullifiers_file, nullifiers))
+            else:
+                nullifiers = set(self._read_records(self.nullifiers_file))
             logger.debug(f"Loaded {len(nullifiers)} nullifiers from {self.nullifiers_file}")
             return nullifiers
         except Exception as e:
             logger.error(f"Error loading nullifiers: {str(e)}")
             return set()
 
-    def save_leaves(self, leaves):
+    def append_leaf(self, leaf):
         """
-        Save the Merkle tree leaves to disk
+        Append a Merkle tree leaf to the leaves file
         
         Args:
-            leaves: List of leaf values
+            leaf: The leaf value, as 32 raw bytes
         """
         try:
-            with open(self.leaves_file, "w") as f:
-                json.dump(leaves, f)
-            logger.debug(f"Saved {len(leaves)} leaves to {self.leaves_file}")
+            self._append(self.leaves_file, leaf)
         except Exception as e:
-            logger.error(f"Error saving leaves: {str(e)}")
+            logger.error(f"Error appending leaf: {str(e)}")
 
     def load_leaves(self):
         """
         Load the Merkle tree leaves from disk
         
         Returns:
-            List of leaf values
+            List of leaf values, as 32 raw bytes each
         """
-        if not self.leaves_file.exists():
-            logger.debug(f"Leaves file {self.leaves_file} does not exist, returning empty list")
-            return []
-        
         try:
-            with open(self.leaves_file, "r") as f:
-                leaves = json.load(f)
+            if not self.leaves_file.exists() and self.legacy_leaves_file.exists():
+                leaves = self._read_snapshot(self.legacy_leaves_file, [])
+                leaves = self._migrate_json_hashes(self.leaves_file, self.legacy_leaves_file, leaves)
+            else:
+                leaves = self._read_records(self.leaves_file)
             logger.debug(f"Loaded {len(leaves)} leaves from {self.leaves_file}")
             return leaves
         except Exception as e:
@@ -95,18 +272,31 @@ class RelayerPersistence:
 
     def save_deposits(self, deposits):
         """
-        Save deposits to disk
+        Save deposits to disk, replacing the snapshot and its log
         
         Args:
             deposits: Dict mapping commitment to deposit info
         """
         try:
-            with open(self.deposits_file, "w") as f:
-                json.dump(deposits, f)
+            self._write_snapshot(self.deposits_file, deposits)
+            self.deposits_log.unlink(missing_ok=True)
             logger.debug(f"Saved {len(deposits)} deposits to {self.deposits_file}")
         except Exception as e:
             logger.error(f"Error saving deposits: {str(e)}")
 
+    def append_deposit(self, commitment, deposit):
+        """
+        Append a deposit to the deposits log
+        
+        Args:
+            commitment: The deposit commitment
+            deposit: The deposit info
+        """
+        try:
+            self._append(self.deposits_log, _dumps({"op": "set", "key": commitment, "value": deposit}) + b"\n")
+        except Exception as e:
+            logger.error(f"Error appending deposit: {str(e)}")
+
     def load_deposits(self):
         """
         Load deposits from disk
@@ -114,13 +304,10 @@ class RelayerPersistence:
         Returns:
             Dict mapping commitment to deposit info
         """
-        if not self.deposits_file.exists():
-            logger.debug(f"Deposits file {self.deposits_file} does not exist, returning empty dict")
-            return {}
-        
         try:
-            with open(self.deposits_file, "r") as f:
-                deposits = json.load(f)
+            deposits = self._read_snapshot(self.deposits_file, {}, _load_amounts)
+            for record in self._read_log(self.deposits_log, _load_amounts):
+                deposits[record["key"]] = record["value"]
             logger.debug(f"Loaded {len(deposits)} deposits from {self.deposits_file}")
             return deposits
         except Exception as e:
@@ -129,18 +316,31 @@ class RelayerPersistence:
 
     def save_withdrawals(self, withdrawals):
         """
-        Save withdrawals to disk
+        Save withdrawals to disk, replacing the snapshot and its log
         
         Args:
             withdrawals: Dict mapping nullifier hash to withdrawal info
         """
         try:
-            with open(self.withdrawals_file, "w") as f:
-                json.dump(withdrawals, f)
+            self._write_snapshot(self.withdrawals_file, withdrawals)
+            self.withdrawals_log.unlink(missing_ok=True)
             logger.debug(f"Saved {len(withdrawals)} withdrawals to {self.withdrawals_file}")
         except Exception as e:
             logger.error(f"Error saving withdrawals: {str(e)}")
 
+    def append_withdrawal(self, nullifier, withdrawal):
+        """
+        Append a withdrawal to the withdrawals log
+        
+        Args:
+            nullifier: The nullifier hash of the withdrawal
+            withdrawal: The withdrawal info
+        """
+        try:
+            self._append(self.withdrawals_log, _dumps({"op": "set", "key": nullifier, "value": withdrawal}) + b"\n")
+        except Exception as e:
+            logger.error(f"Error appending withdrawal: {str(e)}")
+
     def load_withdrawals(self):
         """
         Load withdrawals from disk
@@ -148,15 +348,12 @@ class RelayerPersistence:
         Returns:
             Dict mapping nullifier hash to withdrawal info
         """
-        if not self.withdrawals_file.exists():
-            logger.debug(f"Withdrawals file {self.withdrawals_file} does not exist, returning empty dict")
-            return {}
-        
         try:
-            with open(self.withdrawals_file, "r") as f:
-                withdrawals = json.load(f)
+            withdrawals = self._read_snapshot(self.withdrawals_file, {}, _load_amounts)
+            for record in self._read_log(self.withdrawals_log, _load_amounts):
+                withdrawals[record["key"]] = record["value"]
             logger.debug(f"Loaded {len(withdrawals)} withdrawals from {self.withdrawals_file}")
             return withdrawals
         except Exception as e:
             logger.error(f"Error loading withdrawals: {str(e)}")
-            return {} 
\ No newline at end of file
+            return {}
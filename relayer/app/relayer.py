@@ -1,4 +1,4 @@
-from .merkle import MerkleTree, ZERO_COMMITMENT
+from .merkle import MerkleTree, ZERO_COMMITMENT, ZERO_LEAF, hash_bytes
 from .persistence import RelayerPersistence
 import logging
 import os
@@ -11,7 +11,7 @@ class Relayer:
         self.persistence = RelayerPersistence(data_dir or os.getenv("DATA_DIR", "./data"))
         
         # Load state from disk
-        self.used_nullifiers = self.persistence.load_nullifiers()
+        self.used_nullifiers = self.persistence.load_nullifiers()  # 32-byte nullifier hashes
         self.deposits = self.persistence.load_deposits()
         self.withdrawals = self.persistence.load_withdrawals()
         
@@ -23,17 +23,19 @@ class Relayer:
         if persisted_leaves:
             logger.info(f"Initializing Merkle tree with {len(persisted_leaves)} persisted leaves")
             self.merkle_tree = MerkleTree(initialize_with_zero=False)
-            for leaf in persisted_leaves:
-                self.merkle_tree.add_leaf(leaf)
+            self.merkle_tree.add_leaves(persisted_leaves)
         else:
             # Initialize with default zero commitment
             logger.info("Initializing Merkle tree with default zero commitment")
             self.merkle_tree = MerkleTree(initialize_with_zero=True)
             # Persist the zero commitment
-            self.persistence.save_leaves(self.merkle_tree.leaves)
+            self.persistence.append_leaf(ZERO_LEAF)
         
-        logger.info(f"Relayer initialized with {len(self.merkle_tree.leaves)} leaves and {len(self.used_nullifiers)} used nullifiers")
-        logger.info(f"Current Merkle root: {self.merkle_tree.get_merkle_root()}")
+        # Hex root served to API callers; only changes when a leaf is added
+        self._cached_root = self.merkle_tree.get_merkle_root()
+        
+        logger.info(f"Relayer initialized with {self.merkle_tree.leaf_count} leaves and {len(self.used_nullifiers)} used nullifiers")
+        logger.info(f"Current Merkle root: {self._cached_root}")
 
     def process_deposit(self, user_address, token_address, amount, commitment_hex):
         """
@@ -46,6 +48,7 @@ class Relayer:
             commitment_hex: The commitment hash for this deposit
         """
         logger.info(f"Processing deposit: {commitment_hex[:10]}...")
+        commitment = hash_bytes(commitment_hex)
         
         # Store deposit info
         self.deposits[commitment_hex] = {
@@ -56,14 +59,15 @@ class Relayer:
         }
         
         # Add commitment to Merkle tree
-        self.merkle_tree.add_leaf(commitment_hex)
+        self.merkle_tree.add_leaf(commitment)
+        self._cached_root = self.merkle_tree.get_merkle_root()
         
         # Persist state
-        self.persistence.save_deposits(self.deposits)
-        self.persistence.save_leaves(self.merkle_tree.leaves)
+        self.persistence.append_deposit(commitment_hex, self.deposits[commitment_hex])
+        self.persistence.append_leaf(commitment)
         
-        logger.info(f"Deposit processed. New Merkle Root: {self.merkle_tree.get_merkle_root()[:10]}...")
-        return self.merkle_tree.get_merkle_root()
+        logger.info(f"Deposit processed. New Merkle Root: {self._cached_root[:10]}...")
+        return self._cached_root
 
     def process_withdrawal(self, nullifier_hash_hex, recipient_address, token_address, amount):
         """
@@ -78,7 +82,9 @@ class Relayer:
         logger.info(f"Processing withdrawal event for nullifier: {nullifier_hash_hex[:10]}...")
         
         # Mark the nullifier as used (even though it's already used on-chain)
-        self.used_nullifiers.add(nullifier_hash_hex)
+        nullifier_hash = hash_bytes(nullifier_hash_hex)
+        is_new_nullifier = nullifier_hash not in self.used_nullifiers
+        self.used_nullifiers.add(nullifier_hash)
         
         # Store withdrawal info
         self.withdrawals[nullifier_hash_hex] = {
@@ -89,8 +95,9 @@ class Relayer:
         }
         
         # Persist state
-        self.persistence.save_nullifiers(self.used_nullifiers)
-        self.persistence.save_withdrawals(self.withdrawals)
+        if is_new_nullifier:
+            self.persistence.append_nullifier(nullifier_hash)
+        self.persistence.append_withdrawal(nullifier_hash_hex, self.withdrawals[nullifier_hash_hex])
         
         logger.info(f"Withdrawal event processed for nullifier: {nullifier_hash_hex[:10]}...")
         return True
@@ -105,7 +112,10 @@ class Relayer:
         Returns:
             bool: True if the nullifier has been used, False otherwise
         """
-        return nullifier_hash_hex in self.used_nullifiers
+        try:
+            return hash_bytes(nullifier_hash_hex) in self.used_nullifiers
+        except ValueError:
+            return False
 
     def get_merkle_root(self):
         """
@@ -114,7 +124,7 @@ class Relayer:
         Returns:
             str: The current Merkle root hex string
         """
-        return self.merkle_tree.get_merkle_root()
+        return self._cached_root
 
     def get_merkle_path(self, commitment_hex):
         """
@@ -152,8 +162,14 @@ class Relayer:
         Raises:
             ValueError: If the nullifier has already been used or other validation fails
         """
+        try:
+            nullifier_hash = hash_bytes(nullifier_hash_hex)
+        except ValueError:
+            logger.warning(f"Invalid nullifier hash: {nullifier_hash_hex[:10]}...")
+            raise ValueError("Invalid nullifier hash")
+        
         # Check if nullifier has been used
-        if self.is_nullifier_used(nullifier_hash_hex):
+        if nullifier_hash in self.used_nullifiers:
             logger.warning(f"Nullifier already used: {nullifier_hash_hex[:10]}...")
             raise ValueError("Nullifier already used")
         
@@ -168,7 +184,7 @@ class Relayer:
         # such as verifying a ZK proof that proves the user owns this note
         
         # Mark the nullifier as used
-        self.used_nullifiers.add(nullifier_hash_hex)
+        self.used_nullifiers.add(nullifier_hash)
         
         # Store withdrawal info
         self.withdrawals[nullifier_hash_hex] = {
@@ -180,8 +196,8 @@ class Relayer:
         }
         
         # Persist state
-        self.persistence.save_nullifiers(self.used_nullifiers)
-        self.persistence.save_withdrawals(self.withdrawals)
+        self.persistence.append_nullifier(nullifier_hash)
+        self.persistence.append_withdrawal(nullifier_hash_hex, self.withdrawals[nullifier_hash_hex])
         
         logger.info(f"Withdrawal request accepted for nullifier: {nullifier_hash_hex[:10]}...")
         
@@ -201,8 +217,9 @@ class Relayer:
         Returns:
             dict: Information about the zero commitment
         """
+        leaf_index = self.merkle_tree.leaf_to_index.get(ZERO_LEAF)
         return {
             "zero_commitment": ZERO_COMMITMENT,
-            "is_in_tree": ZERO_COMMITMENT in self.merkle_tree.leaves,
-            "leaf_index": self.merkle_tree.leaves.index(ZERO_COMMITMENT) if ZERO_COMMITMENT in self.merkle_tree.leaves else None
+            "is_in_tree": leaf_index is not None,
+            "leaf_index": leaf_index
         } 
\ No newline at end of file
@@ -0,0 +1,59 @@
+import os
+import tempfile
+import unittest
+
+# The relayer is created when app.api is imported, so point it at a scratch
+# data directory first
+_data_dir = tempfile.TemporaryDirectory()
+os.environ["DATA_DIR"] = _data_dir.name
+
+from fastapi.testclient import TestClient
+from app.api import app, relayer
+from app.merkle import ZERO_COMMITMENT
+
+client = TestClient(app)
+
+def tearDownModule():
+    relayer.persistence.flush()
+    _data_dir.cleanup()
+
+class TestAPI(unittest.TestCase):
+    def test_health_endpoint(self):
+        """Test the health check endpoint."""
+        response = client.get("/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"status": "Relayer is running"})
+
+    def test_withdraw_uint256_amount(self):
+        """Test that a withdrawal of an amount wider than 64 bits succeeds and returns its Merkle path."""
+        commitment = os.urandom(32).hex()
+        relayer.process_deposit("0x" + "11" * 20, "0x" + "22" * 20, 10 ** 20, commitment)
+        request = {
+            "nullifier_hash": os.urandom(32).hex(),
+            "commitment": commitment,
+            "recipient": "0x" + "33" * 20,
+            "token": "0x" + "22" * 20,
+            "amount": 10 ** 20
+        }
+        
+        response = client.post("/withdraw", json=request)
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["amount"], 10 ** 20)
+        self.assertEqual(data["merkle_path"], client.get("/merkle_path", params={"commitment": commitment}).json())
+        
+        response = client.post("/withdraw", json=request)
+        self.assertEqual(response.status_code, 400)
+
+    def test_merkle_root(self):
+        """Test that the Merkle root endpoint serves the relayer's root."""
+        response = client.get("/merkle_root")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"root": relayer.get_merkle_root()})
+        
+        info = client.get("/zero_commitment").json()
+        self.assertEqual(info["zero_commitment"], ZERO_COMMITMENT)
+        self.assertTrue(info["is_in_tree"])
+
+if __name__ == "__main__":
+    unittest.main()
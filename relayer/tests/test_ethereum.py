@@ -0,0 +1,207 @@
+import asyncio
+import contextlib
+import unittest
+import uuid
+from unittest import mock
+
+from eth_abi import encode
+from hexbytes import HexBytes
+
+from app.blockchain import ethereum
+from app.blockchain.ethereum import EthereumListener, MAX_BLOCK_RANGE, MAX_POLL_INTERVAL, POLL_INTERVAL, RPC_POOL_SIZE
+
+CONTRACT_ADDRESS = "0x" + "11" * 20
+
+def make_listener():
+    """Creates a listener for an endpoint no other test shares, since web3 caches sessions per endpoint."""
+    return EthereumListener(None, rpc_url=f"http://127.0.0.1:9/{uuid.uuid4().hex}", contract_address=CONTRACT_ADDRESS)
+
+class TestEthereumListenerSession(unittest.TestCase):
+    def test_session_survives_restart(self):
+        """Test that a restarted listener keeps using the configured RPC session."""
+        async def run():
+            listener = make_listener()
+            with mock.patch.object(listener, "run_polling", mock.AsyncMock()):
+                await listener.start()
+                session = listener.session
+                await listener.stop()
+                await listener.start()
+            self.assertIs(listener.session, session)
+            self.assertFalse(session.closed)
+            self.assertEqual(session.connector.limit, RPC_POOL_SIZE)
+            self.assertFalse(listener.running)
+            
+            # A new listener for the same endpoint, as created by a listener restart in the API
+            replacement = EthereumListener(None, rpc_url=listener.rpc_url, contract_address=CONTRACT_ADDRESS)
+            with mock.patch.object(replacement, "run_polling", mock.AsyncMock()):
+                await replacement.start()
+            self.assertIs(replacement.session, session)
+            
+            await listener.close_session()
+            self.assertTrue(session.closed)
+        asyncio.run(run())
+
+    def test_failed_start_is_restartable(self):
+        """Test that a listener whose polling fails can be started again."""
+        async def run():
+            listener = make_listener()
+            with mock.patch.object(listener, "run_polling", mock.AsyncMock(side_effect=RuntimeError("boom"))):
+                with self.assertRaises(RuntimeError):
+                    await listener.start()
+            self.assertFalse(listener.running)
+            self.assertFalse(listener.session.closed)
+            await listener.close_session()
+        asyncio.run(run())
+
+class FakeEth:
+    """Stands in for w3.eth, serving logs from a list and recording eth_getLogs ranges."""
+    def __init__(self, block_number, logs=()):
+        self.current_block = block_number
+        self.logs = list(logs)
+        self.requested_ranges = []
+
+    @property
+    async def block_number(self):
+        return self.current_block
+
+    async def get_logs(self, log_filter):
+        self.requested_ranges.append((log_filter["fromBlock"], log_filter["toBlock"]))
+        return [log for log in self.logs if log_filter["fromBlock"] <= log["blockNumber"] <= log_filter["toBlock"]]
+
+class FakeWebsocketW3:
+    """Stands in for a persistent websocket AsyncWeb3, yielding logs once and then stopping the listener."""
+    def __init__(self, listener, logs):
+        self.listener = listener
+        self.logs = logs
+        self.eth = mock.Mock(subscribe=mock.AsyncMock())
+
+    async def listen_to_websocket(self):
+        for log in self.logs:
+            yield log
+        self.listener.running = False
+
+def address_topic(address_byte):
+    return HexBytes(bytes(12) + bytes([address_byte]) * 20)
+
+def deposit_log(listener, block_number, log_index, commitment=b"\x44" * 32, amount=10 ** 20):
+    return {
+        "address": listener.contract.address,
+        "topics": [HexBytes(listener.deposit_topic), address_topic(0x22), address_topic(0x33)],
+        "data": HexBytes(encode(["uint256", "bytes32"], [amount, commitment])),
+        "blockNumber": block_number,
+        "logIndex": log_index,
+        "transactionHash": HexBytes(b"\x55" * 32),
+        "transactionIndex": 0,
+        "blockHash": HexBytes(b"\x66" * 32)
+    }
+
+def withdrawal_log(listener, block_number, log_index, nullifier_hash=b"\x77" * 32, amount=5):
+    return {
+        **deposit_log(listener, block_number, log_index),
+        "topics": [HexBytes(listener.withdrawal_topic), HexBytes(nullifier_hash), address_topic(0x88), address_topic(0x33)],
+        "data": HexBytes(encode(["uint256"], [amount]))
+    }
+
+def make_fake_listener(fake_eth, ws_url=None):
+    """Creates a listener with a mock relayer whose RPC calls go to fake_eth."""
+    listener = EthereumListener(mock.Mock(), rpc_url="http://127.0.0.1:9", contract_address=CONTRACT_ADDRESS, ws_url=ws_url)
+    listener.w3 = mock.Mock(eth=fake_eth)
+    return listener
+
+class TestEthereumListenerEvents(unittest.TestCase):
+    def test_dispatch_by_topic(self):
+        """Test that deposits and withdrawals are decoded and forwarded, and other logs ignored."""
+        listener = make_fake_listener(FakeEth(0))
+        async def run():
+            await listener.process_log(deposit_log(listener, 5, 0))
+            await listener.process_log(withdrawal_log(listener, 5, 1))
+            await listener.process_log({**deposit_log(listener, 5, 2), "topics": [HexBytes(b"\x99" * 32)]})
+            await listener.process_log({**deposit_log(listener, 6, 0), "removed": True})
+        asyncio.run(run())
+        
+        listener.relayer.process_deposit.assert_called_once_with(
+            "0x" + "22" * 20, "0x" + "33" * 20, 10 ** 20, "44" * 32
+        )
+        listener.relayer.process_withdrawal.assert_called_once_with(
+            "77" * 32, "0x" + "88" * 20, "0x" + "33" * 20, 5
+        )
+
+    def test_duplicate_logs_processed_once(self):
+        """Test that logs at or before the last handled (blockNumber, logIndex) are skipped."""
+        listener = make_fake_listener(FakeEth(0))
+        async def run():
+            for block_number, log_index in [(5, 0), (5, 1), (5, 1), (5, 0), (4, 9), (6, 0)]:
+                await listener.process_log(deposit_log(listener, block_number, log_index, commitment=bytes([block_number, log_index]) * 16))
+        asyncio.run(run())
+        
+        commitments = [call.args[3] for call in listener.relayer.process_deposit.call_args_list]
+        self.assertEqual(commitments, [bytes([5, 0]).hex() * 16, bytes([5, 1]).hex() * 16, bytes([6, 0]).hex() * 16])
+
+    def test_poll_splits_block_ranges(self):
+        """Test that the first poll only records the start block and later polls fetch in bounded ranges."""
+        fake_eth = FakeEth(100)
+        listener = make_fake_listener(fake_eth)
+        fake_eth.logs = [deposit_log(listener, 150, 0), deposit_log(listener, 2500, 0, commitment=b"\x45" * 32)]
+        async def run():
+            self.assertEqual(await listener.poll_events(), 0)
+            self.assertEqual(fake_eth.requested_ranges, [])
+            fake_eth.current_block = 100 + 2 * MAX_BLOCK_RANGE + 500
+            self.assertEqual(await listener.poll_events(), 2)
+            self.assertEqual(await listener.poll_events(), 0)
+        asyncio.run(run())
+        
+        self.assertEqual(fake_eth.requested_ranges, [
+            (101, 100 + MAX_BLOCK_RANGE),
+            (101 + MAX_BLOCK_RANGE, 100 + 2 * MAX_BLOCK_RANGE),
+            (101 + 2 * MAX_BLOCK_RANGE, 100 + 2 * MAX_BLOCK_RANGE + 500)
+        ])
+        self.assertEqual(listener.last_processed_block, 100 + 2 * MAX_BLOCK_RANGE + 500)
+        self.assertEqual(listener.relayer.process_deposit.call_count, 2)
+
+    def test_idle_polling_backs_off(self):
+        """Test that the poll interval grows while idle, is capped, and resets once events arrive."""
+        listener = make_fake_listener(FakeEth(0))
+        results = [0, 0, 1, 0] + [0] * 10
+        delays = []
+        async def fake_poll():
+            if len(delays) == len(results) - 1:
+                listener.running = False
+            return results[len(delays)]
+        async def fake_sleep(delay):
+            delays.append(delay)
+        
+        listener.running = True
+        with mock.patch.object(listener, "poll_events", fake_poll), mock.patch.object(ethereum.asyncio, "sleep", fake_sleep):
+            asyncio.run(listener.run_polling())
+        
+        self.assertEqual(delays[:4], [POLL_INTERVAL * 2, POLL_INTERVAL * 3, POLL_INTERVAL, POLL_INTERVAL * 2])
+        self.assertEqual(delays[-1], MAX_POLL_INTERVAL)
+
+    def test_subscription_advances_processed_block(self):
+        """Test that logs from the subscription move the catch-up poll's starting block forward."""
+        fake_eth = FakeEth(100)
+        listener = make_fake_listener(fake_eth, ws_url="ws://127.0.0.1:9")
+        received = [deposit_log(listener, 120, 0), deposit_log(listener, 130, 0, commitment=b"\x45" * 32)]
+        
+        @contextlib.asynccontextmanager
+        async def fake_websocket(provider):
+            yield FakeWebsocketW3(listener, received)
+        
+        async def run():
+            listener.running = True
+            with mock.patch.object(ethereum.AsyncWeb3, "persistent_websocket", fake_websocket), \
+                    mock.patch.object(ethereum, "WebsocketProviderV2"):
+                await listener.subscribe_events()
+            self.assertEqual(listener.last_processed_block, 129)
+            
+            # A reconnect's catch-up poll resumes at the last log's block and skips what was already handled
+            fake_eth.current_block = 140
+            fake_eth.logs = received
+            self.assertEqual(await listener.poll_events(), 1)
+        asyncio.run(run())
+        
+        self.assertEqual(fake_eth.requested_ranges, [(130, 140)])
+        self.assertEqual(listener.relayer.process_deposit.call_count, 2)
+
+if __name__ == "__main__":
+    unittest.main()
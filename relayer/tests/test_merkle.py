@@ -0,0 +1,138 @@
+import hashlib
+import importlib.util
+import os
+import subprocess
+import sys
+import unittest
+from unittest import mock
+
+from app import merkle
+from app.merkle import MerkleTree, TREE_HEIGHT, ZERO_COMMITMENT, ZERO_HASHES
+
+def reference_root(leaves):
+    """Computes the root of a fixed-height tree naively, level by level, padding odd levels with empty subtree roots."""
+    nodes = list(leaves)
+    for level in range(TREE_HEIGHT):
+        if len(nodes) % 2:
+            nodes.append(ZERO_HASHES[level])
+        nodes = [hashlib.sha256(nodes[i] + nodes[i + 1]).digest() for i in range(0, len(nodes), 2)]
+    return nodes[0].hex()
+
+def verify_path(leaf, path):
+    """Folds a Merkle path from leaf up to the root it proves membership in."""
+    node = leaf
+    for sibling, index in zip(path["path_elements"], path["path_indices"]):
+        sibling = bytes.fromhex(sibling)
+        node = hashlib.sha256(sibling + node if index else node + sibling).digest()
+    return node
+
+def random_leaves(count):
+    return [os.urandom(32) for _ in range(count)]
+
+# Leaf counts around the level_hash threshold and odd-sized levels
+LEAF_COUNTS = [1, 2, 3, 5, 8, 15, 16, 17, 33, 64]
+
+class TestMerkleTree(unittest.TestCase):
+    def test_add_leaf_matches_reference(self):
+        """Test that incremental inserts produce the reference root after every leaf."""
+        tree = MerkleTree(initialize_with_zero=False)
+        leaves = []
+        for leaf in random_leaves(40):
+            tree.add_leaf(leaf.hex())
+            leaves.append(leaf)
+            self.assertEqual(tree.get_merkle_root(), reference_root(leaves))
+
+    def test_add_leaves_matches_reference(self):
+        """Test that bulk loading produces the reference root, with and without level_hash."""
+        backends = [("hashlib", None)]
+        if merkle._load_level_hash() is not None:
+            backends.append(("level_hash", merkle.level_hash))
+        for name, level_hash in backends:
+            for count in LEAF_COUNTS:
+                with self.subTest(backend=name, count=count), mock.patch.object(merkle, "_load_level_hash", lambda: level_hash):
+                    leaves = random_leaves(count)
+                    tree = MerkleTree(initialize_with_zero=False)
+                    tree.add_leaves(leaves)
+                    self.assertEqual(tree.get_merkle_root(), reference_root(leaves))
+                    
+                    # Further leaves keep extending the bulk-loaded levels
+                    extra = random_leaves(3)
+                    tree.add_leaves(extra[:2])
+                    tree.add_leaf(extra[2])
+                    self.assertEqual(tree.get_merkle_root(), reference_root(leaves + extra))
+
+    def test_every_path_verifies(self):
+        """Test that the path of every leaf folds up to the root."""
+        leaves = [bytes.fromhex(ZERO_COMMITMENT)] + random_leaves(20)
+        tree = MerkleTree()
+        tree.add_leaves(leaves[1:])
+        root = bytes.fromhex(tree.get_merkle_root())
+        for index, leaf in enumerate(leaves):
+            path = tree.get_merkle_path(leaf.hex())
+            self.assertEqual(path["leaf_index"], index)
+            self.assertEqual(len(path["path_elements"]), TREE_HEIGHT)
+            self.assertEqual(verify_path(leaf, path), root)
+        self.assertEqual(tree.get_merkle_path("0x" + leaves[5].hex()), tree.get_merkle_path(leaves[5].hex()))
+
+    def test_paths_follow_new_leaves(self):
+        """Test that cached paths are refreshed when the tree grows."""
+        tree = MerkleTree()
+        leaf = os.urandom(32)
+        tree.add_leaf(leaf)
+        tree.get_merkle_path(leaf.hex())
+        tree.add_leaf(os.urandom(32))
+        self.assertEqual(verify_path(leaf, tree.get_merkle_path(leaf.hex())), bytes.fromhex(tree.get_merkle_root()))
+
+    def test_zero_initialized_tree(self):
+        """Test that a tree holding only the zero commitment has the empty subtree root."""
+        tree = MerkleTree()
+        self.assertEqual(tree.leaf_count, 1)
+        self.assertEqual(tree.get_merkle_root(), ZERO_HASHES[TREE_HEIGHT].hex())
+        path = tree.get_merkle_path(ZERO_COMMITMENT)
+        self.assertEqual(path["path_elements"], [zero_hash.hex() for zero_hash in ZERO_HASHES[:TREE_HEIGHT]])
+
+    def test_empty_tree(self):
+        """Test that a tree without leaves has no root and no paths."""
+        tree = MerkleTree(initialize_with_zero=False)
+        tree.add_leaves([])
+        self.assertEqual(tree.leaf_count, 0)
+        self.assertIsNone(tree.get_merkle_root())
+        with self.assertRaises(ValueError):
+            tree.get_merkle_path(ZERO_COMMITMENT)
+
+    def test_invalid_leaves_rejected(self):
+        """Test that leaves that are not 32-byte hashes are rejected without changing the tree."""
+        tree = MerkleTree()
+        root = tree.get_merkle_root()
+        for leaf in ["abcd", "zz" * 32, b"\x01" * 31, 42]:
+            with self.subTest(leaf=leaf):
+                with self.assertRaises(ValueError):
+                    tree.add_leaf(leaf)
+                with self.assertRaises(ValueError):
+                    tree.add_leaves([os.urandom(32), leaf])
+                with self.assertRaises(ValueError):
+                    tree.get_merkle_path(leaf)
+        self.assertEqual(tree.leaf_count, 1)
+        self.assertEqual(tree.get_merkle_root(), root)
+
+class TestLevelHash(unittest.TestCase):
+    def test_numba_not_imported_eagerly(self):
+        """Test that importing the Merkle module does not load numba."""
+        code = "import sys, app.merkle; print('numba' in sys.modules)"
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.stdout.strip(), "False")
+
+    @unittest.skipUnless(importlib.util.find_spec("numba"), "numba is not installed")
+    def test_matches_hashlib(self):
+        """Test that the numba kernel matches hashlib.sha256 over random 64-byte inputs."""
+        from app.merkle_numba import level_hash
+        for n_pairs in [1, 2, 7, 8, 9, 64, 257]:
+            with self.subTest(n_pairs=n_pairs):
+                buf = os.urandom(n_pairs * 64)
+                expected = b"".join(hashlib.sha256(buf[i:i + 64]).digest() for i in range(0, len(buf), 64))
+                self.assertEqual(bytes(level_hash(buf, n_pairs)), expected)
+                self.assertEqual(bytes(level_hash(bytearray(buf), n_pairs)), expected)
+
+if __name__ == "__main__":
+    unittest.main()
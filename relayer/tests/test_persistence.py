@@ -0,0 +1,82 @@
+import json
+import os
+import tempfile
+import unittest
+
+from app.persistence import RelayerPersistence
+
+class TestRelayerPersistence(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        self.data_dir = self.tmp_dir.name
+
+    def reopen(self, persistence):
+        """Flushes persistence and opens the data directory again, as after a restart."""
+        persistence.flush()
+        return RelayerPersistence(self.data_dir)
+
+    def test_round_trip(self):
+        """Test that appended records are loaded back after a restart."""
+        persistence = RelayerPersistence(self.data_dir)
+        leaves = [bytes([i]) * 32 for i in range(3)]
+        for leaf in leaves:
+            persistence.append_leaf(leaf)
+        persistence.append_nullifier(leaves[1])
+        persistence.append_deposit("ab" * 32, {"amount": 2 ** 80})
+        persistence.append_withdrawal("cd" * 32, {"amount": 5})
+        
+        persistence = self.reopen(persistence)
+        self.assertEqual(persistence.load_leaves(), leaves)
+        self.assertEqual(persistence.load_nullifiers(), {leaves[1]})
+        self.assertEqual(persistence.load_deposits(), {"ab" * 32: {"amount": 2 ** 80}})
+        self.assertEqual(persistence.load_withdrawals(), {"cd" * 32: {"amount": 5}})
+
+    def test_torn_log_record_does_not_swallow_next_record(self):
+        """Test that a record torn by a crash is dropped without losing the record appended after it."""
+        persistence = RelayerPersistence(self.data_dir)
+        persistence.append_deposit("01" * 32, {"amount": 1})
+        persistence.flush()
+        with open(persistence.deposits_log, "ab") as f:
+            f.write(b'{"op": "set", "key": "02')
+        
+        persistence = RelayerPersistence(self.data_dir)
+        persistence.append_deposit("03" * 32, {"amount": 3})
+        
+        persistence = self.reopen(persistence)
+        self.assertEqual(persistence.load_deposits(), {"01" * 32: {"amount": 1}, "03" * 32: {"amount": 3}})
+        self.assertEqual(persistence.log_records, 2)
+
+    def test_torn_leaf_record_truncated(self):
+        """Test that a partial leaf record is dropped and later leaves stay aligned."""
+        persistence = RelayerPersistence(self.data_dir)
+        persistence.append_leaf(b"\x01" * 32)
+        persistence.flush()
+        with open(persistence.leaves_file, "ab") as f:
+            f.write(b"\x02" * 10)
+        
+        self.assertEqual(persistence.load_leaves(), [b"\x01" * 32])
+        persistence.append_leaf(b"\x03" * 32)
+        persistence = self.reopen(persistence)
+        self.assertEqual(persistence.load_leaves(), [b"\x01" * 32, b"\x03" * 32])
+
+    def test_migrates_legacy_json_files(self):
+        """Test that leaves.json and nullifiers.json are packed into the .bin files and removed."""
+        leaves = ["11" * 32, "22" * 32]
+        with open(os.path.join(self.data_dir, "leaves.json"), "w") as f:
+            json.dump(leaves, f)
+        with open(os.path.join(self.data_dir, "nullifiers.json"), "w") as f:
+            json.dump(["33" * 32], f)
+        
+        persistence = RelayerPersistence(self.data_dir)
+        self.assertEqual(persistence.load_leaves(), [bytes.fromhex(leaf) for leaf in leaves])
+        self.assertEqual(persistence.load_nullifiers(), {b"\x33" * 32})
+        self.assertFalse(persistence.legacy_leaves_file.exists())
+        self.assertFalse(persistence.legacy_nullifiers_file.exists())
+        
+        persistence = self.reopen(persistence)
+        self.assertEqual(persistence.load_leaves(), [bytes.fromhex(leaf) for leaf in leaves])
+        self.assertEqual(persistence.load_nullifiers(), {b"\x33" * 32})
+
+if __name__ == "__main__":
+    unittest.main()